@@ -1,12 +1,21 @@
 import os
+import csv
 import uuid
 import math
-from datetime import datetime
+import shutil
+import sqlite3
+import tempfile
+import threading
+import multiprocessing
+from collections import Counter
+from contextlib import closing
+from functools import lru_cache
+from datetime import datetime, timedelta
 
 import cv2
 import numpy as np
 import pandas as pd
-from flask import Flask, render_template, request, jsonify, Response, send_file
+from flask import Flask, render_template, request, jsonify, Response, send_from_directory
 from ultralytics import YOLO
 
 # ================= MQTT =================
@@ -39,6 +48,7 @@ MODEL_PATH = os.path.join(BASE_DIR, "models", "best.pt")
 
 STREAM_SNAPSHOT_DIR = os.path.join(BASE_DIR, "snapshot")
 STREAM_VIDEO_DIR = os.path.join(BASE_DIR, "video_stream")
+GROWTH_DB_PATH = os.path.join(BASE_DIR, "growth.db")
 
 RTSP_URL = "http://172.27.70.16:4747/video"  # sesuaikan
 
@@ -56,6 +66,19 @@ CONF_THRESHOLD = 0.60
 MIN_LENGTH_PX = 40.0
 BORDER_MARGIN = 0.08
 
+# ================== MODE INFERENSI ==========================
+# "full"  : frame utuh ke model
+# "roi"   : crop ke ROI valid (di luar BORDER_MARGIN) sebelum inferensi
+# "tiled" : ROI dipecah jadi tile overlap (1 batch), digabung dengan NMS
+#           -> untuk kamera 1080p/4K agar ikan kecil tidak hilang saat downsample
+INFERENCE_MODE = "full"
+ROI_CROP_PAD_PX = 48       # padding crop ROI supaya ikan di tepi ROI tidak terpotong
+TILE_SIZE = 640            # samakan dengan imgsz training (ukuran tile minimum)
+TILE_MAX_FISH_CM = 30.0    # ikan terpanjang yang diharapkan (~1.2 x HARVEST_LENGTH_CM)
+TILE_EDGE_PX = 4           # deteksi yang menempel tepi dalam tile dianggap terpotong
+NMS_IOU_THRESHOLD = 0.50
+NMS_IOS_THRESHOLD = 0.70   # intersection / area box terkecil (hanya antar tile berbeda)
+
 # ================= MQTT CONFIG =================
 MQTT_BROKER = "172.27.27.133"
 MQTT_PORT = 1883
@@ -70,6 +93,50 @@ GAP_MS_BETWEEN_TURNS = 600
 # safety: batasi putaran maksimum supaya tidak overdosing
 MAX_TURNS = 12
 
+# ================= PARAMETER ESTIMASI PANEN =================
+HARVEST_LENGTH_CM = 25.0
+NEAR_HARVEST_LENGTH_CM = 20.0
+
+# ================= TIME-SERIES PERTUMBUHAN =================
+# lebar bin histogram panjang (cm) untuk persentil rollup harian/mingguan
+GROWTH_HIST_BIN_CM = 0.25
+# panjang di atas nilai ini masuk ke bin terakhir
+GROWTH_HIST_MAX_CM = 40.0
+# jumlah hari terakhir yang dipakai untuk regresi proyeksi panen
+GROWTH_PROJECTION_DAYS = 30
+
+# ================= AGREGASI PER-IKAN (VIDEO) =================
+# hanya frame dengan confidence >= nilai ini yang dipakai untuk estimasi panjang
+TRACK_MIN_CONF = 0.70
+# lebar bin histogram panjang per ikan (cm) untuk median seluruh sampel
+TRACK_LENGTH_BIN_CM = 0.05
+# track yang terlihat kurang dari ini dianggap noise (tidak dihitung ikan)
+TRACK_MIN_FRAMES = 5
+# gating penggabungan track terfragmentasi (track hilang -> track baru)
+TRACK_MERGE_MAX_GAP = 45           # frame
+TRACK_MERGE_MAX_DIST_PX = 80.0     # jarak titik tengah head-tail
+TRACK_MERGE_MAX_LEN_RATIO = 0.25   # selisih relatif panjang
+
+# ================= VIDEO PARALEL (PROCESS POOL) =================
+# jumlah worker saat workers="auto" sekaligus batas maksimum (sisakan 1 core untuk Flask)
+VIDEO_SHARD_WORKERS = max((os.cpu_count() or 2) - 1, 1)
+# workers="auto" hanya memecah video sepanjang minimal ini (frame)
+VIDEO_SHARD_MIN_FRAMES = 3600
+# panjang shard minimal (frame), shard lebih pendek tidak sebanding dengan load model
+VIDEO_SHARD_MIN_SHARD_FRAMES = 300
+# frame sebelum awal shard yang hanya dipakai untuk inisialisasi tracker
+SHARD_WARMUP_FRAMES = 15
+
+VIDEO_LOG_FIELDS = ["run_id", "frame", "track_id", "fish_id", "confidence", "length_px", "length_cm"]
+
+# ================= SERVING HASIL ANALISIS =================
+# nama file hasil unik per run (lihat reserve_output) -> boleh di-cache lama
+ANALYSIS_CACHE_MAX_AGE = 365 * 24 * 3600
+RECORDS_PER_PAGE = 50
+RECORDS_MAX_PER_PAGE = 500
+THUMB_WIDTH = 320
+WEBP_QUALITY = 85
+
 
 # ============================================================
 # INISIALISASI FLASK + MODEL
@@ -87,6 +154,24 @@ def run_id() -> str:
     return datetime.now().strftime("%Y%m%d-%H%M%S") + "-" + uuid.uuid4().hex[:5]
 
 
+def reserve_output(folder: str, prefix: str):
+    """
+    Nama file hasil unik per run: <prefix>_<run_id>. File CSV dibuat eksklusif
+    (O_EXCL) sebagai penanda, jadi nama tidak pernah dipakai ulang walau file
+    lama dihapus atau dua request datang bersamaan -> aman di-cache immutable.
+    Kembalikan (run_id, stem).
+    """
+    while True:
+        rid = run_id()
+        stem = f"{prefix}_{rid}"
+        try:
+            fd = os.open(os.path.join(folder, stem + ".csv"), os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            continue
+        os.close(fd)
+        return rid, stem
+
+
 # ============================================================
 # LOGIKA MULTI-PUTARAN + ESTIMASI PANEN
 # ============================================================
@@ -113,9 +198,9 @@ def fish_to_turns(n: int) -> int:
 
 
 def estimate_harvest(avg_length_cm: float) -> str:
-    if avg_length_cm >= 25.0:
+    if avg_length_cm >= HARVEST_LENGTH_CM:
         return "Siap Panen"
-    if avg_length_cm >= 20.0:
+    if avg_length_cm >= NEAR_HARVEST_LENGTH_CM:
         return "Mendekati Panen"
     return "Belum Panen"
 
@@ -164,6 +249,248 @@ def publish_feeding_command(summary: dict, source: str = "manual"):
         print(f"[MQTT] ERROR publish: {e}")
 
 
+# ============================================================
+# TIME-SERIES PERTUMBUHAN (SQLITE, APPEND-ONLY + ROLLUP)
+# ============================================================
+#
+# runs          : satu baris per analisis (gambar / video)
+# fish_lengths  : panjang per ikan / per track tiap run
+# rollups       : agregat harian & mingguan (count, sum, sumsq, min, max)
+# rollup_hist   : histogram panjang per bucket -> persentil tanpa scan data mentah
+#
+# Rollup diperbarui saat data masuk, sehingga query kurva pertumbuhan hanya
+# membaca jumlah bucket, bukan jumlah run.
+
+GROWTH_PERIODS = ("day", "week")
+_growth_lock = threading.Lock()
+
+
+def growth_db():
+    conn = sqlite3.connect(GROWTH_DB_PATH, timeout=10)
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def init_growth_store():
+    with closing(growth_db()) as conn, conn:
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY,
+                ts TEXT NOT NULL,
+                source TEXT NOT NULL,
+                num_fish INTEGER NOT NULL,
+                avg_length_cm REAL NOT NULL,
+                min_length_cm REAL NOT NULL,
+                max_length_cm REAL NOT NULL,
+                csv_name TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_runs_ts ON runs (ts);
+
+            CREATE TABLE IF NOT EXISTS fish_lengths (
+                run_id TEXT NOT NULL,
+                ts TEXT NOT NULL,
+                fish_id INTEGER NOT NULL,
+                length_cm REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_fish_lengths_run ON fish_lengths (run_id);
+
+            CREATE TABLE IF NOT EXISTS rollups (
+                period TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                n_runs INTEGER NOT NULL,
+                n_fish INTEGER NOT NULL,
+                sum_cm REAL NOT NULL,
+                sumsq_cm REAL NOT NULL,
+                min_cm REAL,
+                max_cm REAL,
+                PRIMARY KEY (period, bucket)
+            );
+
+            CREATE TABLE IF NOT EXISTS rollup_hist (
+                period TEXT NOT NULL,
+                bucket TEXT NOT NULL,
+                bin INTEGER NOT NULL,
+                count INTEGER NOT NULL,
+                PRIMARY KEY (period, bucket, bin)
+            );
+        """)
+
+
+def growth_bucket(ts: datetime, period: str) -> str:
+    if period == "week":
+        # bucket mingguan = tanggal hari Senin (ISO week)
+        return (ts - timedelta(days=ts.weekday())).strftime("%Y-%m-%d")
+    return ts.strftime("%Y-%m-%d")
+
+
+def length_to_bin(length_cm: float, bin_cm: float = GROWTH_HIST_BIN_CM) -> int:
+    max_bin = int(GROWTH_HIST_MAX_CM / bin_cm) - 1
+    return min(max(int(length_cm / bin_cm), 0), max_bin)
+
+
+def record_growth_run(summary: dict, fish_lengths: dict, source: str, csv_name: str = None, ts: datetime = None):
+    """
+    Simpan satu run ke time-series + perbarui rollup harian/mingguan.
+    fish_lengths: {fish_id: length_cm} (per ikan untuk gambar, per track untuk video)
+    Run yang sama tidak pernah ditulis dua kali (append-only).
+    """
+    ts = ts or datetime.now()
+    ts_str = ts.strftime("%Y-%m-%d %H:%M:%S")
+    rid = summary["run_id"]
+    lengths = [float(v) for v in fish_lengths.values()]
+
+    try:
+        with _growth_lock, closing(growth_db()) as conn, conn:
+            cur = conn.execute(
+                "INSERT OR IGNORE INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (rid, ts_str, source, int(summary.get("num_fish", 0)),
+                 float(summary.get("avg_length_cm", 0.0)),
+                 float(summary.get("min_length_cm", 0.0)),
+                 float(summary.get("max_length_cm", 0.0)),
+                 csv_name),
+            )
+            if cur.rowcount == 0:
+                return
+
+            conn.executemany(
+                "INSERT INTO fish_lengths VALUES (?, ?, ?, ?)",
+                [(rid, ts_str, int(fid), float(length)) for fid, length in fish_lengths.items()],
+            )
+
+            bins = Counter(length_to_bin(v) for v in lengths)
+            for period in GROWTH_PERIODS:
+                bucket = growth_bucket(ts, period)
+                conn.execute(
+                    """
+                    INSERT INTO rollups VALUES (?, ?, 1, ?, ?, ?, ?, ?)
+                    ON CONFLICT (period, bucket) DO UPDATE SET
+                        n_runs = n_runs + 1,
+                        n_fish = n_fish + excluded.n_fish,
+                        sum_cm = sum_cm + excluded.sum_cm,
+                        sumsq_cm = sumsq_cm + excluded.sumsq_cm,
+                        min_cm = MIN(COALESCE(min_cm, excluded.min_cm), COALESCE(excluded.min_cm, min_cm)),
+                        max_cm = MAX(COALESCE(max_cm, excluded.max_cm), COALESCE(excluded.max_cm, max_cm))
+                    """,
+                    (period, bucket, len(lengths), sum(lengths), sum(v * v for v in lengths),
+                     min(lengths, default=None), max(lengths, default=None)),
+                )
+                conn.executemany(
+                    """
+                    INSERT INTO rollup_hist VALUES (?, ?, ?, ?)
+                    ON CONFLICT (period, bucket, bin) DO UPDATE SET count = count + excluded.count
+                    """,
+                    [(period, bucket, b, c) for b, c in bins.items()],
+                )
+    except Exception as e:
+        print(f"[GROWTH] ERROR simpan run {rid}: {e}")
+
+
+def hist_percentile(hist: dict, total: int, q: float, bin_cm: float = GROWTH_HIST_BIN_CM) -> float:
+    """Persentil dari histogram bin (nilai tengah bin)."""
+    if total <= 0:
+        return 0.0
+    target = q * total
+    cum = 0
+    for b in sorted(hist):
+        cum += hist[b]
+        if cum >= target:
+            return (b + 0.5) * bin_cm
+    return (max(hist) + 0.5) * bin_cm
+
+
+def growth_curve(period: str = "day", since: str = None) -> list:
+    """Kurva pertumbuhan per bucket dari tabel rollup (tanpa membaca run mentah)."""
+    if period not in GROWTH_PERIODS:
+        raise ValueError(f"period harus salah satu dari {GROWTH_PERIODS}")
+
+    since = since or "0000-00-00"
+    with closing(growth_db()) as conn:
+        rows = conn.execute(
+            "SELECT * FROM rollups WHERE period = ? AND bucket >= ? ORDER BY bucket",
+            (period, since),
+        ).fetchall()
+        hist_rows = conn.execute(
+            "SELECT bucket, bin, count FROM rollup_hist WHERE period = ? AND bucket >= ?",
+            (period, since),
+        ).fetchall()
+
+    hists = {}
+    for r in hist_rows:
+        hists.setdefault(r["bucket"], {})[r["bin"]] = r["count"]
+
+    curve = []
+    for r in rows:
+        n = r["n_fish"]
+        mean = r["sum_cm"] / n if n else 0.0
+        var = max(r["sumsq_cm"] / n - mean * mean, 0.0) if n else 0.0
+        hist = hists.get(r["bucket"], {})
+        curve.append({
+            "bucket": r["bucket"],
+            "num_runs": r["n_runs"],
+            "count": n,
+            "mean_length_cm": mean,
+            "std_length_cm": math.sqrt(var),
+            "min_length_cm": r["min_cm"] or 0.0,
+            "max_length_cm": r["max_cm"] or 0.0,
+            "p10_length_cm": hist_percentile(hist, n, 0.10),
+            "p50_length_cm": hist_percentile(hist, n, 0.50),
+            "p90_length_cm": hist_percentile(hist, n, 0.90),
+        })
+    return curve
+
+
+def project_harvest(curve: list) -> dict:
+    """
+    Proyeksi tanggal panen: regresi linear rata-rata panjang harian
+    (GROWTH_PROJECTION_DAYS hari terakhir) sampai HARVEST_LENGTH_CM.
+    """
+    points = [c for c in curve if c["count"] > 0]
+    if not points:
+        return {"status": "no_data", "harvest_length_cm": HARVEST_LENGTH_CM}
+
+    last = points[-1]
+    last_day = datetime.strptime(last["bucket"], "%Y-%m-%d")
+    result = {
+        "harvest_length_cm": HARVEST_LENGTH_CM,
+        "latest_bucket": last["bucket"],
+        "latest_mean_cm": last["mean_length_cm"],
+        "harvest_status": estimate_harvest(last["mean_length_cm"]),
+    }
+
+    if last["mean_length_cm"] >= HARVEST_LENGTH_CM:
+        result.update({"status": "ready", "projected_date": last["bucket"], "days_remaining": 0})
+        return result
+
+    window_start = last_day - timedelta(days=GROWTH_PROJECTION_DAYS)
+    window = [c for c in points if datetime.strptime(c["bucket"], "%Y-%m-%d") >= window_start]
+    if len(window) < 2:
+        result["status"] = "insufficient_data"
+        return result
+
+    x = np.array([(datetime.strptime(c["bucket"], "%Y-%m-%d") - last_day).days for c in window], dtype=float)
+    y = np.array([c["mean_length_cm"] for c in window], dtype=float)
+    w = np.sqrt([c["count"] for c in window])
+    slope, intercept = np.polyfit(x, y, 1, w=w)
+
+    result["growth_cm_per_day"] = float(slope)
+    if slope <= 0:
+        result["status"] = "not_growing"
+        return result
+
+    days_remaining = int(math.ceil((HARVEST_LENGTH_CM - intercept) / slope))
+    days_remaining = max(days_remaining, 0)
+    result.update({
+        "status": "projected",
+        "days_remaining": days_remaining,
+        "projected_date": (last_day + timedelta(days=days_remaining)).strftime("%Y-%m-%d"),
+    })
+    return result
+
+
+init_growth_store()
+
+
 # ============================================================
 # FUNGSI BANTU (FILTER + ANOTASI)
 # ============================================================
@@ -193,6 +520,192 @@ def draw_annotations(img, box, head, tail, length_cm: float, fish_id=None):
     cv2.putText(img, text, (x1, max(0, y1 - 10)), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
 
 
+def image_variant_names(img_name: str):
+    """IMG_ANALYSIS_0001.png -> (IMG_ANALYSIS_0001.webp, IMG_ANALYSIS_0001_thumb.webp)"""
+    stem = os.path.splitext(img_name)[0]
+    return f"{stem}.webp", f"{stem}_thumb.webp"
+
+
+def write_image_variants(annotated, img_name: str):
+    """Simpan varian WebP (ukuran penuh) + thumbnail untuk tampilan web."""
+    webp_name, thumb_name = image_variant_names(img_name)
+    params = [cv2.IMWRITE_WEBP_QUALITY, WEBP_QUALITY]
+
+    cv2.imwrite(os.path.join(WEB_OUTPUT_IMAGE, webp_name), annotated, params)
+
+    h, w = annotated.shape[:2]
+    if w > THUMB_WIDTH:
+        thumb = cv2.resize(annotated, (THUMB_WIDTH, max(int(h * THUMB_WIDTH / w), 1)), interpolation=cv2.INTER_AREA)
+    else:
+        thumb = annotated
+    cv2.imwrite(os.path.join(WEB_OUTPUT_IMAGE, thumb_name), thumb, params)
+
+
+# ============================================================
+# INFERENSI (FULL FRAME / ROI / TILED)
+# ============================================================
+
+def empty_predictions():
+    return np.zeros((0, 2, 2), dtype=np.float32), np.zeros((0, 4), dtype=np.float32), np.zeros((0,), dtype=np.float32)
+
+
+def result_to_arrays(res, offset=(0, 0)):
+    """Result ultralytics -> (kpts, boxes, confs) numpy, digeser ke koordinat frame asli."""
+    if res.keypoints is None or len(res.keypoints) == 0:
+        return empty_predictions()
+
+    kpts = res.keypoints.xy.cpu().numpy().astype(np.float32)
+    boxes = res.boxes.xyxy.cpu().numpy().astype(np.float32)
+    confs = res.boxes.conf.cpu().numpy().astype(np.float32)
+
+    ox, oy = offset
+    if ox or oy:
+        kpts = kpts + np.array([ox, oy], dtype=np.float32)
+        boxes = boxes + np.array([ox, oy, ox, oy], dtype=np.float32)
+    return kpts, boxes, confs
+
+
+def valid_roi_rect(img_shape, pad: int = 0):
+    """Kotak ROI valid (BORDER_MARGIN) + padding, di-clip ke ukuran gambar."""
+    h, w = img_shape[:2]
+    x1 = max(int(w * BORDER_MARGIN) - pad, 0)
+    y1 = max(int(h * BORDER_MARGIN) - pad, 0)
+    x2 = min(int(math.ceil(w * (1.0 - BORDER_MARGIN))) + pad, w)
+    y2 = min(int(math.ceil(h * (1.0 - BORDER_MARGIN))) + pad, h)
+    return x1, y1, x2, y2
+
+
+def tile_geometry():
+    """
+    (tile, overlap) dalam px untuk mode tiled. Overlap >= panjang ikan terpanjang
+    (TILE_MAX_FISH_CM pada PX_PER_CM saat ini) + margin tepi, sehingga tiap ikan
+    utuh di minimal 1 tile. Tile dibesarkan (di-resize model ke imgsz) jika
+    stride akan lebih kecil dari overlap.
+    """
+    overlap = int(math.ceil(TILE_MAX_FISH_CM * PX_PER_CM)) + 2 * TILE_EDGE_PX
+    return max(TILE_SIZE, 2 * overlap), overlap
+
+
+def tile_starts(length: int, tile: int, overlap: int):
+    if length <= tile:
+        return [0]
+    step = max(tile - overlap, 1)
+    starts = list(range(0, length - tile, step))
+    starts.append(length - tile)
+    return starts
+
+
+def nms_fish(boxes, confs, tile_ids, iou_thr: float, ios_thr: float):
+    """
+    1. NMS greedy biasa (IoU) berdasarkan confidence, sama seperti full frame.
+    2. Antar deteksi dari tile BERBEDA: jika sebagian besar box kecil berada di
+       dalam box besar (intersection / area box terkecil >= ios_thr), itu
+       potongan ikan yang sama -> box yang lebih besar (ikan utuh) dipertahankan.
+    """
+    if len(boxes) == 0:
+        return np.zeros((0,), dtype=int)
+
+    x1, y1, x2, y2 = boxes[:, 0], boxes[:, 1], boxes[:, 2], boxes[:, 3]
+    areas = np.maximum(x2 - x1, 0) * np.maximum(y2 - y1, 0)
+
+    def intersection(i, rest):
+        iw = np.maximum(np.minimum(x2[i], x2[rest]) - np.maximum(x1[i], x1[rest]), 0)
+        ih = np.maximum(np.minimum(y2[i], y2[rest]) - np.maximum(y1[i], y1[rest]), 0)
+        return iw * ih
+
+    order = np.argsort(-confs)
+    keep = []
+    while len(order) > 0:
+        i = order[0]
+        keep.append(i)
+        rest = order[1:]
+        inter = intersection(i, rest)
+        iou = inter / np.maximum(areas[i] + areas[rest] - inter, 1e-6)
+        order = rest[iou < iou_thr]
+
+    order = np.array(sorted(keep, key=lambda k: -areas[k]), dtype=int)
+    final = []
+    while len(order) > 0:
+        i = order[0]
+        final.append(i)
+        rest = order[1:]
+        ios = intersection(i, rest) / np.maximum(np.minimum(areas[i], areas[rest]), 1e-6)
+        fragment = (ios >= ios_thr) & (tile_ids[rest] != tile_ids[i])
+        order = rest[~fragment]
+
+    return np.array(sorted(final), dtype=int)
+
+
+def predict_fish(img, mode: str = None):
+    """
+    Jalankan model sesuai INFERENCE_MODE, kembalikan (kpts, boxes, confs)
+    dalam koordinat gambar asli.
+
+    full  : gambar utuh -> model (perilaku lama)
+    roi   : crop ke ROI valid (+ROI_CROP_PAD_PX), area BORDER_MARGIN tidak diinferensi
+    tiled : ROI dipecah jadi tile overlap (tile_geometry), satu panggilan
+            model (batch), lalu digabung dengan NMS
+    """
+    mode = mode or INFERENCE_MODE
+
+    if mode == "full":
+        return result_to_arrays(model(img)[0])
+
+    rx1, ry1, rx2, ry2 = valid_roi_rect(img.shape, ROI_CROP_PAD_PX)
+    crop = img[ry1:ry2, rx1:rx2]
+
+    if mode == "roi":
+        return result_to_arrays(model(crop)[0], offset=(rx1, ry1))
+
+    if mode != "tiled":
+        raise ValueError(f"INFERENCE_MODE tidak dikenal: {mode}")
+
+    ch, cw = crop.shape[:2]
+    tile_size, overlap = tile_geometry()
+    xs = tile_starts(cw, tile_size, overlap)
+    ys = tile_starts(ch, tile_size, overlap)
+    origins = [(tx, ty) for ty in ys for tx in xs]
+    tiles = [crop[ty:ty + tile_size, tx:tx + tile_size] for tx, ty in origins]
+
+    results = model(tiles)
+
+    all_kpts, all_boxes, all_confs, all_tiles = [], [], [], []
+    for t, ((tx, ty), tile, res) in enumerate(zip(origins, tiles, results)):
+        kpts, boxes, confs = result_to_arrays(res)
+        if len(boxes) == 0:
+            continue
+
+        # buang deteksi yang menempel tepi tile bagian dalam (ikan terpotong);
+        # karena overlap >= panjang ikan, ikan tsb utuh di tile tetangga
+        th, tw = tile.shape[:2]
+        inner = np.ones(len(boxes), dtype=bool)
+        if tx > 0:
+            inner &= boxes[:, 0] > TILE_EDGE_PX
+        if tx + tw < cw:
+            inner &= boxes[:, 2] < tw - TILE_EDGE_PX
+        if ty > 0:
+            inner &= boxes[:, 1] > TILE_EDGE_PX
+        if ty + th < ch:
+            inner &= boxes[:, 3] < th - TILE_EDGE_PX
+
+        ox, oy = rx1 + tx, ry1 + ty
+        all_kpts.append(kpts[inner] + np.array([ox, oy], dtype=np.float32))
+        all_boxes.append(boxes[inner] + np.array([ox, oy, ox, oy], dtype=np.float32))
+        all_confs.append(confs[inner])
+        all_tiles.append(np.full(int(inner.sum()), t, dtype=int))
+
+    if not all_boxes:
+        return empty_predictions()
+
+    kpts = np.concatenate(all_kpts)
+    boxes = np.concatenate(all_boxes)
+    confs = np.concatenate(all_confs)
+    tile_ids = np.concatenate(all_tiles)
+
+    keep = nms_fish(boxes, confs, tile_ids, NMS_IOU_THRESHOLD, NMS_IOS_THRESHOLD)
+    return kpts[keep], boxes[keep], confs[keep]
+
+
 # ============================================================
 # ANALISIS GAMBAR
 # ============================================================
@@ -200,59 +713,64 @@ def draw_annotations(img, box, head, tail, length_cm: float, fish_id=None):
 def analyze_image(img_path):
     global LAST_SUMMARY
 
-    rid = run_id()
     img = cv2.imread(img_path)
     if img is None:
         raise RuntimeError(f"Gagal membaca gambar: {img_path}")
 
-    res = model(img)[0]
+    rid, stem = reserve_output(WEB_OUTPUT_IMAGE, "IMG_ANALYSIS")
 
-    annotated = img.copy()
-    records = []
+    img_name = f"{stem}.png"
+    csv_name = f"{stem}.csv"
 
-    if res.keypoints is not None and len(res.keypoints) > 0:
-        kpts = res.keypoints.xy.cpu().numpy()
-        boxes = res.boxes.xyxy.cpu().numpy()
-        confs = res.boxes.conf.cpu().numpy()
+    try:
+        kpts, boxes, confs = predict_fish(img)
 
-        fish_index = 1
+        annotated = img.copy()
+        records = []
 
-        for i in range(len(kpts)):
-            conf = float(confs[i])
-            if conf < CONF_THRESHOLD:
-                continue
+        if len(kpts) > 0:
+            fish_index = 1
 
-            head = kpts[i, 0]
-            tail = kpts[i, 1]
+            for i in range(len(kpts)):
+                conf = float(confs[i])
+                if conf < CONF_THRESHOLD:
+                    continue
 
-            length_px = float(np.linalg.norm(head - tail))
-            if length_px < MIN_LENGTH_PX:
-                continue
+                head = kpts[i, 0]
+                tail = kpts[i, 1]
 
-            box = boxes[i]
-            if not inside_valid_roi(box, img.shape):
-                continue
+                length_px = float(np.linalg.norm(head - tail))
+                if length_px < MIN_LENGTH_PX:
+                    continue
 
-            length_cm = length_px / PX_PER_CM
+                box = boxes[i]
+                if not inside_valid_roi(box, img.shape):
+                    continue
 
-            draw_annotations(annotated, box, head, tail, length_cm, fish_id=fish_index)
+                length_cm = length_px / PX_PER_CM
 
-            records.append({
-                "run_id": rid,
-                "fish_id": fish_index,
-                "confidence": conf,
-                "length_px": length_px,
-                "length_cm": length_cm,
-            })
+                draw_annotations(annotated, box, head, tail, length_cm, fish_id=fish_index)
 
-            fish_index += 1
+                records.append({
+                    "run_id": rid,
+                    "fish_id": fish_index,
+                    "confidence": conf,
+                    "length_px": length_px,
+                    "length_cm": length_cm,
+                })
 
-    idx = len(os.listdir(WEB_OUTPUT_IMAGE)) + 1
-    img_name = f"IMG_ANALYSIS_{idx:04d}.png"
-    csv_name = f"IMG_ANALYSIS_{idx:04d}.csv"
+                fish_index += 1
 
-    cv2.imwrite(os.path.join(WEB_OUTPUT_IMAGE, img_name), annotated)
-    pd.DataFrame(records).to_csv(os.path.join(WEB_OUTPUT_IMAGE, csv_name), index=False)
+        cv2.imwrite(os.path.join(WEB_OUTPUT_IMAGE, img_name), annotated)
+        write_image_variants(annotated, img_name)
+        pd.DataFrame(records).to_csv(os.path.join(WEB_OUTPUT_IMAGE, csv_name), index=False)
+    except Exception:
+        # jangan tinggalkan IMG_ANALYSIS_* setengah jadi (CSV penanda dari reserve_output)
+        for name in (csv_name, img_name) + image_variant_names(img_name):
+            path = os.path.join(WEB_OUTPUT_IMAGE, name)
+            if os.path.exists(path):
+                os.remove(path)
+        raise
 
     max_len = max([r["length_cm"] for r in records], default=0.0)
     min_len = min([r["length_cm"] for r in records], default=0.0)
@@ -274,6 +792,8 @@ def analyze_image(img_path):
         "feeding_gap_ms": GAP_MS_BETWEEN_TURNS,
     }
 
+    record_growth_run(summary, {r["fish_id"]: r["length_cm"] for r in records}, "image", csv_name)
+
     LAST_SUMMARY = summary
     return img_name, csv_name, summary, records
 
@@ -286,21 +806,15 @@ def distance_fn(detection, tracked_object):
     return np.linalg.norm(detection.points - tracked_object.estimate, axis=1).mean()
 
 
-if USE_TRACKING:
-    tracker = Tracker(distance_function=distance_fn, distance_threshold=30)
-else:
-    tracker = None
+def make_tracker():
+    """Tracker baru per video, supaya ID & state tidak bocor antar analisis."""
+    if not USE_TRACKING:
+        return None
+    return Tracker(distance_function=distance_fn, distance_threshold=30)
 
 
-def yolo_to_detections(res):
+def yolo_to_detections(kpts, boxes, confs):
     detections = []
-    if res.keypoints is None or len(res.keypoints) == 0:
-        return detections
-
-    kpts = res.keypoints.xy.cpu().numpy()
-    boxes = res.boxes.xyxy.cpu().numpy()
-    confs = res.boxes.conf.cpu().numpy()
-
     for i in range(len(kpts)):
         conf = float(confs[i])
         if conf < CONF_THRESHOLD:
@@ -318,16 +832,213 @@ def yolo_to_detections(res):
             Detection(
                 points=np.array([head, tail]),
                 scores=np.array([conf, conf]),
-                data={"box": box},
+                data={"box": box, "conf": conf},
             )
         )
     return detections
 
 
-def analyze_video(video_path):
+class TrackLengthAggregator:
+    """
+    Agregasi panjang per ikan secara streaming (memori O(jumlah track)).
+
+    - Panjang tiap ikan = median seluruh sampel dengan confidence >= TRACK_MIN_CONF,
+      dihitung dari histogram bin TRACK_LENGTH_BIN_CM (memori terbatas per ikan,
+      bisa dijumlahkan saat menggabungkan shard).
+    - Track baru yang muncul dekat (jarak, waktu, panjang) dengan ikan yang
+      baru saja hilang dianggap ikan yang sama (track terfragmentasi).
+    - Track yang terlihat < TRACK_MIN_FRAMES frame tidak dihitung sebagai ikan.
+    """
+
+    def __init__(self):
+        self.track_to_fish = {}
+        self.fish = {}
+        self.next_fish_id = 1
+
+    def _new_fish(self, frame_idx):
+        fish_id = self.next_fish_id
+        self.next_fish_id += 1
+        self.fish[fish_id] = {
+            "track_ids": [],
+            "samples": Counter(),
+            "fallback": Counter(),
+            "frames": 0,
+            "first_frame": frame_idx,
+            "last_frame": frame_idx,
+            "first_center": None,
+            "first_length_px": 0.0,
+            "last_center": None,
+            "last_length_px": 0.0,
+        }
+        return fish_id
+
+    def _match_lost_fish(self, frame_idx, center, length_px):
+        best_id, best_dist = None, None
+        for fish_id, st in self.fish.items():
+            gap = frame_idx - st["last_frame"]
+            if gap <= 0 or gap > TRACK_MERGE_MAX_GAP:
+                continue
+
+            dist = float(np.linalg.norm(center - st["last_center"]))
+            if dist > TRACK_MERGE_MAX_DIST_PX:
+                continue
+
+            ref = max(st["last_length_px"], 1e-6)
+            if abs(length_px - ref) / ref > TRACK_MERGE_MAX_LEN_RATIO:
+                continue
+
+            if best_dist is None or dist < best_dist:
+                best_id, best_dist = fish_id, dist
+        return best_id
+
+    def update_frame(self, frame_idx, observations):
+        """
+        observations: list (track_id, head, tail, conf) untuk satu frame.
+        Track yang sudah dikenal diproses dulu, supaya ikan yang masih aktif
+        tidak dianggap "hilang" lalu digabung dengan track baru.
+        Kembalikan list fish_id sesuai urutan observations.
+        """
+        order = sorted(range(len(observations)), key=lambda k: observations[k][0] not in self.track_to_fish)
+        fish_ids = [None] * len(observations)
+        for k in order:
+            fish_ids[k] = self.update(frame_idx, *observations[k])
+        return fish_ids
+
+    def update(self, frame_idx, track_id, head, tail, conf):
+        """Tambahkan satu observasi track, kembalikan fish_id (ID gabungan)."""
+        length_px = float(np.linalg.norm(head - tail))
+        center = (np.asarray(head, dtype=float) + np.asarray(tail, dtype=float)) / 2.0
+
+        fish_id = self.track_to_fish.get(track_id)
+        if fish_id is None:
+            fish_id = self._match_lost_fish(frame_idx, center, length_px)
+            if fish_id is None:
+                fish_id = self._new_fish(frame_idx)
+            self.track_to_fish[track_id] = fish_id
+            self.fish[fish_id]["track_ids"].append(track_id)
+
+        st = self.fish[fish_id]
+        if st["last_frame"] != frame_idx or st["frames"] == 0:
+            st["frames"] += 1
+        if st["first_center"] is None:
+            st["first_center"] = center
+            st["first_length_px"] = length_px
+        st["last_frame"] = frame_idx
+        st["last_center"] = center
+        st["last_length_px"] = length_px
+
+        b = length_to_bin(length_px / PX_PER_CM, TRACK_LENGTH_BIN_CM)
+        st["fallback"][b] += 1
+        if conf >= TRACK_MIN_CONF:
+            st["samples"][b] += 1
+
+        return fish_id
+
+    def export_fish(self):
+        """State per ikan dalam bentuk yang bisa di-pickle (dikirim dari worker shard)."""
+        return {
+            fish_id: dict(st, samples=dict(st["samples"]), fallback=dict(st["fallback"]))
+            for fish_id, st in self.fish.items()
+        }
+
+    def absorb_fish(self, state, track_prefix="", into=None):
+        """
+        Masukkan state ikan hasil export_fish() dari shard lain, sebagai ikan
+        baru (into=None) atau sebagai lanjutan ikan `into`. Kembalikan fish_id.
+        """
+        if into is None:
+            into = self._new_fish(state["first_frame"])
+            self.fish[into]["first_center"] = state["first_center"]
+            self.fish[into]["first_length_px"] = state["first_length_px"]
+
+        st = self.fish[into]
+        st["track_ids"].extend(f"{track_prefix}{t}" for t in state["track_ids"])
+        st["samples"].update(state["samples"])
+        st["fallback"].update(state["fallback"])
+        st["frames"] += state["frames"]
+        st["last_frame"] = state["last_frame"]
+        st["last_center"] = state["last_center"]
+        st["last_length_px"] = state["last_length_px"]
+        return into
+
+    def results(self):
+        """Statistik per ikan (bukan per baris log)."""
+        fish_records = []
+        for fish_id, st in self.fish.items():
+            if st["frames"] < TRACK_MIN_FRAMES:
+                continue
+
+            hist = st["samples"] or st["fallback"]
+            fish_records.append({
+                "fish_id": fish_id,
+                "track_ids": ";".join(str(t) for t in st["track_ids"]),
+                "frames": st["frames"],
+                "first_frame": st["first_frame"],
+                "last_frame": st["last_frame"],
+                "high_conf_samples": sum(st["samples"].values()),
+                "length_cm": hist_percentile(hist, sum(hist.values()), 0.5, TRACK_LENGTH_BIN_CM),
+            })
+        return fish_records
+
+
+def frame_observations(frame, tracker):
+    """
+    Inferensi satu frame -> list (track_id, head, tail, box, conf) yang valid.
+    Dengan Norfair track_id = ID tracker, tanpa Norfair = urutan deteksi.
+    """
+    kpts, boxes, confs = predict_fish(frame)
+    observations = []
+
+    if tracker is not None:
+        detections = yolo_to_detections(kpts, boxes, confs)
+        tracks = tracker.update(detections)
+        matched = {id(d) for d in detections}
+
+        for track_obj in tracks:
+            # track tanpa deteksi di frame ini hanya berisi prediksi Kalman
+            # (dan conf lama) -> bukan sampel panjang yang valid
+            det = track_obj.last_detection
+            if det is None or id(det) not in matched:
+                continue
+
+            head, tail = det.points[0], det.points[1]
+            box = det.data.get("box")
+
+            if box is None or not inside_valid_roi(box, frame.shape):
+                continue
+
+            conf = float(det.data.get("conf", 0.0))
+            observations.append((int(track_obj.id), head, tail, box, conf))
+    else:
+        for i in range(len(kpts)):
+            conf = float(confs[i])
+            if conf < CONF_THRESHOLD:
+                continue
+
+            head = kpts[i, 0]
+            tail = kpts[i, 1]
+
+            length_px = float(np.linalg.norm(head - tail))
+            if length_px < MIN_LENGTH_PX:
+                continue
+
+            box = boxes[i]
+            if not inside_valid_roi(box, frame.shape):
+                continue
+
+            observations.append((i + 1, head, tail, box, conf))
+
+    return observations
+
+
+def analyze_video(video_path, workers=1):
+    """
+    workers = 1      : satu proses (perilaku lama)
+    workers = N      : video dipecah jadi N shard waktu, dianalisis di process pool
+    workers = "auto" : VIDEO_SHARD_WORKERS jika video >= VIDEO_SHARD_MIN_FRAMES
+    """
     global LAST_SUMMARY
 
-    rid = run_id()
     cap = cv2.VideoCapture(video_path)
     if not cap.isOpened():
         raise RuntimeError(f"Gagal membuka video: {video_path}")
@@ -335,10 +1046,13 @@ def analyze_video(video_path):
     fps = cap.get(cv2.CAP_PROP_FPS) or 15
     w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
     h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    n_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+
+    workers = resolve_video_workers(workers, n_frames)
 
-    idx = len(os.listdir(WEB_OUTPUT_VIDEO)) + 1
-    out_video = f"VID_ANALYSIS_{idx:04d}.mp4"
-    out_csv = f"VID_ANALYSIS_{idx:04d}.csv"
+    rid, stem = reserve_output(WEB_OUTPUT_VIDEO, "VID_ANALYSIS")
+    out_video = f"{stem}.mp4"
+    out_csv = f"{stem}.csv"
 
     out_vpath = os.path.join(WEB_OUTPUT_VIDEO, out_video)
     csv_path = os.path.join(WEB_OUTPUT_VIDEO, out_csv)
@@ -346,7 +1060,43 @@ def analyze_video(video_path):
     fourcc = cv2.VideoWriter_fourcc(*"avc1")
     writer = cv2.VideoWriter(out_vpath, fourcc, fps, (w, h))
 
-    logs = []
+    try:
+        # log per frame langsung ditulis ke CSV (tidak ditahan di memori)
+        with open(csv_path, "w", newline="") as csv_file:
+            log_writer = csv.DictWriter(csv_file, fieldnames=VIDEO_LOG_FIELDS)
+            log_writer.writeheader()
+
+            if workers > 1:
+                cap.release()
+                total_logs, aggregator = analyze_video_shards(video_path, n_frames, workers, rid, writer, log_writer)
+            else:
+                total_logs, aggregator = analyze_video_frames(cap, rid, writer, log_writer)
+    except Exception:
+        # jangan tinggalkan VID_ANALYSIS_* setengah jadi
+        writer.release()
+        for path in (out_vpath, csv_path):
+            if os.path.exists(path):
+                os.remove(path)
+        raise
+    finally:
+        cap.release()
+        writer.release()
+
+    fish_records = aggregator.results()
+    video_summary = summarize_fish(rid, fish_records)
+
+    record_growth_run(video_summary, {r["fish_id"]: r["length_cm"] for r in fish_records}, "video", out_csv)
+
+    LAST_SUMMARY = video_summary
+    return out_video, out_csv, rid, total_logs, fish_records, video_summary
+
+
+def analyze_video_frames(cap, rid, writer, log_writer):
+    """Jalur satu proses: inferensi + tracking + anotasi frame demi frame."""
+    tracker = make_tracker()
+    aggregator = TrackLengthAggregator()
+
+    total_logs = 0
     frame_idx = 0
 
     while True:
@@ -354,105 +1104,275 @@ def analyze_video(video_path):
         if not ok:
             break
 
-        res = model(frame)[0]
         annotated = frame.copy()
 
-        if USE_TRACKING:
-            detections = yolo_to_detections(res)
-            tracks = tracker.update(detections)
+        # (track_id, head, tail, box, conf) per observasi valid di frame ini
+        observations = frame_observations(frame, tracker)
+        fish_ids = aggregator.update_frame(frame_idx, [(t, hd, tl, c) for t, hd, tl, _, c in observations])
 
-            for track_obj in tracks:
-                if track_obj.estimate is None or len(track_obj.estimate) < 2:
-                    continue
+        for (track_id, head, tail, box, conf), fish_id in zip(observations, fish_ids):
+            length_px = float(np.linalg.norm(head - tail))
+            length_cm = length_px / PX_PER_CM
 
-                head, tail = track_obj.estimate[0], track_obj.estimate[1]
-                box = track_obj.last_detection.data.get("box")
+            draw_annotations(annotated, box, head, tail, length_cm, fish_id=fish_id)
 
-                if box is None or not inside_valid_roi(box, frame.shape):
-                    continue
+            log_writer.writerow({
+                "run_id": rid,
+                "frame": frame_idx,
+                "track_id": track_id,
+                "fish_id": fish_id,
+                "confidence": conf,
+                "length_px": length_px,
+                "length_cm": length_cm,
+            })
+            total_logs += 1
 
-                length_px = float(np.linalg.norm(head - tail))
-                length_cm = length_px / PX_PER_CM
-                fish_id = int(track_obj.id)
+        writer.write(annotated)
+        frame_idx += 1
 
-                draw_annotations(annotated, box, head, tail, length_cm, fish_id=fish_id)
+    return total_logs, aggregator
 
-                logs.append({
-                    "run_id": rid,
-                    "frame": frame_idx,
-                    "track_id": fish_id,
-                    "length_px": length_px,
-                    "length_cm": length_cm,
-                })
-        else:
-            if res.keypoints is not None and len(res.keypoints) > 0:
-                kpts = res.keypoints.xy.cpu().numpy()
-                boxes = res.boxes.xyxy.cpu().numpy()
-                confs = res.boxes.conf.cpu().numpy()
 
-                for i in range(len(kpts)):
-                    conf = float(confs[i])
-                    if conf < CONF_THRESHOLD:
-                        continue
+def summarize_fish(rid, fish_records):
+    lengths = [r["length_cm"] for r in fish_records]
 
-                    head = kpts[i, 0]
-                    tail = kpts[i, 1]
+    num_fish = len(fish_records)
+    avg_len = float(np.mean(lengths)) if lengths else 0.0
+    max_len = max(lengths, default=0.0)
+    min_len = min(lengths, default=0.0)
 
-                    length_px = float(np.linalg.norm(head - tail))
-                    if length_px < MIN_LENGTH_PX:
-                        continue
+    turns = fish_to_turns(num_fish)
+
+    return {
+        "run_id": rid,
+        "num_fish": num_fish,
+        "max_length_cm": max_len,
+        "min_length_cm": min_len,
+        "avg_length_cm": avg_len,
+        "harvest_status": estimate_harvest(avg_len),
+        "feeding_turns": turns,
+        "feeding_duration_ms": BASE_MS_PER_TURN,
+        "feeding_gap_ms": GAP_MS_BETWEEN_TURNS,
+    }
+
+
+# ============================================================
+# ANALISIS VIDEO PARALEL (SHARD + PROCESS POOL)
+# ============================================================
+#
+# 1. Video dipecah jadi shard waktu (rentang frame) yang berurutan.
+# 2. Tiap shard dianalisis di proses terpisah (model & tracker sendiri),
+#    hasil per-frame ditulis ke CSV sementara.
+# 3. Ikan di awal shard k+1 dicocokkan dengan ikan yang masih terlihat di akhir
+#    shard k (gating jarak, waktu, panjang) -> ID global yang konsisten.
+# 4. Proses utama menulis CSV gabungan + video anotasi dengan ID global
+#    (tanpa inferensi ulang).
+
+SHARD_LOG_FIELDS = ["frame", "track_id", "fish_id", "confidence", "length_px", "length_cm",
+                    "x1", "y1", "x2", "y2", "hx", "hy", "tx", "ty"]
+
+# konfigurasi yang ikut dikirim ke worker (bisa diubah saat runtime)
+SHARD_WORKER_SETTINGS = ("INFERENCE_MODE", "PX_PER_CM", "CONF_THRESHOLD", "MIN_LENGTH_PX", "BORDER_MARGIN",
+                         "TILE_MAX_FISH_CM")
+
+
+def resolve_video_workers(workers, n_frames: int) -> int:
+    if n_frames <= 0:
+        return 1
+
+    if workers == "auto":
+        workers = VIDEO_SHARD_WORKERS if n_frames >= VIDEO_SHARD_MIN_FRAMES else 1
+
+    # nilai dari form dibatasi: tiap worker memuat model sendiri (RAM), dan
+    # shard terlalu pendek tidak sebanding dengan biaya load model per worker
+    workers = min(int(workers or 1), VIDEO_SHARD_WORKERS, n_frames // VIDEO_SHARD_MIN_SHARD_FRAMES)
+    return max(workers, 1)
+
+
+def plan_video_shards(n_frames: int, workers: int):
+    """Rentang frame [start, end) per shard; shard terakhir dibaca sampai EOF."""
+    size = int(math.ceil(n_frames / workers))
+    shards = [(k * size, (k + 1) * size) for k in range(workers)]
+    shards[-1] = (shards[-1][0], None)
+    return shards
+
+
+def _init_shard_worker(settings):
+    globals().update(settings)
+
+
+def _analyze_shard(task):
+    """Dijalankan di worker: analisis frame [start, end) dari video."""
+    video_path, shard_idx, start, end, shard_csv = task
+
+    cap = cv2.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise RuntimeError(f"Gagal membuka video: {video_path}")
 
-                    box = boxes[i]
-                    if not inside_valid_roi(box, frame.shape):
-                        continue
+    tracker = make_tracker()
+    aggregator = TrackLengthAggregator()
 
-                    length_cm = length_px / PX_PER_CM
-                    fish_id = i + 1
+    # tracker di-warm-up beberapa frame sebelum start, supaya track sudah
+    # terinisialisasi tepat di batas shard
+    frame_idx = max(start - SHARD_WARMUP_FRAMES, 0) if tracker is not None else start
+    if frame_idx > 0:
+        cap.set(cv2.CAP_PROP_POS_FRAMES, frame_idx)
 
-                    draw_annotations(annotated, box, head, tail, length_cm, fish_id=fish_id)
+    with open(shard_csv, "w", newline="") as f:
+        log_writer = csv.DictWriter(f, fieldnames=SHARD_LOG_FIELDS)
+        log_writer.writeheader()
 
-                    logs.append({
-                        "run_id": rid,
+        while end is None or frame_idx < end:
+            ok, frame = cap.read()
+            if not ok:
+                break
+
+            observations = frame_observations(frame, tracker)
+
+            if frame_idx >= start:
+                fish_ids = aggregator.update_frame(frame_idx, [(t, hd, tl, c) for t, hd, tl, _, c in observations])
+
+                for (track_id, head, tail, box, conf), fish_id in zip(observations, fish_ids):
+                    length_px = float(np.linalg.norm(head - tail))
+                    log_writer.writerow({
                         "frame": frame_idx,
-                        "track_id": fish_id,
+                        "track_id": track_id,
+                        "fish_id": fish_id,
+                        "confidence": conf,
                         "length_px": length_px,
-                        "length_cm": length_cm,
+                        "length_cm": length_px / PX_PER_CM,
+                        "x1": float(box[0]), "y1": float(box[1]), "x2": float(box[2]), "y2": float(box[3]),
+                        "hx": float(head[0]), "hy": float(head[1]), "tx": float(tail[0]), "ty": float(tail[1]),
                     })
 
-        writer.write(annotated)
-        frame_idx += 1
+            frame_idx += 1
 
     cap.release()
-    writer.release()
+    return {
+        "shard": shard_idx,
+        "start": start,
+        "end": frame_idx,
+        "csv": shard_csv,
+        "fish": aggregator.export_fish(),
+    }
 
-    pd.DataFrame(logs).to_csv(csv_path, index=False)
 
-    if logs:
-        df = pd.DataFrame(logs)
-        unique_ids = df["track_id"].nunique() if "track_id" in df.columns else 0
-        avg_len = float(df["length_cm"].mean()) if "length_cm" in df.columns else 0.0
-        max_len = float(df["length_cm"].max()) if "length_cm" in df.columns else 0.0
-        min_len = float(df["length_cm"].min()) if "length_cm" in df.columns else 0.0
-    else:
-        unique_ids, avg_len, max_len, min_len = 0, 0.0, 0.0, 0.0
+def stitch_shards(shard_results):
+    """
+    Gabungkan ikan per shard jadi ID global. Ikan yang muncul di awal shard
+    dicocokkan (greedy, jarak terdekat dulu) dengan ikan global yang masih
+    terlihat di akhir shard sebelumnya, memakai gating yang sama dengan
+    penggabungan track terfragmentasi (TRACK_MERGE_*).
+    Kembalikan (aggregator global, list {fish_id lokal: fish_id global} per shard).
+    """
+    aggregator = TrackLengthAggregator()
+    id_maps = []
+
+    for res in shard_results:
+        start = res["start"]
+        prefix = f"{res['shard']}-"
+
+        open_ids = [gid for gid, st in aggregator.fish.items() if 0 < start - st["last_frame"] <= TRACK_MERGE_MAX_GAP]
+        entering = [(lid, st) for lid, st in res["fish"].items() if st["first_frame"] - start < TRACK_MERGE_MAX_GAP]
+
+        pairs = []
+        for gid in open_ids:
+            g = aggregator.fish[gid]
+            for lid, st in entering:
+                dist = float(np.linalg.norm(g["last_center"] - st["first_center"]))
+                if dist > TRACK_MERGE_MAX_DIST_PX:
+                    continue
 
-    turns = fish_to_turns(int(unique_ids))
+                ref = max(g["last_length_px"], 1e-6)
+                if abs(st["first_length_px"] - ref) / ref > TRACK_MERGE_MAX_LEN_RATIO:
+                    continue
 
+                pairs.append((dist, gid, lid))
 
-    video_summary = {
-        "run_id": rid,
-        "num_fish": int(unique_ids),
-        "max_length_cm": max_len,
-        "min_length_cm": min_len,
-        "avg_length_cm": avg_len,
-        "harvest_status": estimate_harvest(avg_len),
-        "feeding_turns": turns,
-        "feeding_duration_ms": BASE_MS_PER_TURN,
-        "feeding_gap_ms": GAP_MS_BETWEEN_TURNS,
-    }
+        id_map = {}
+        used = set()
+        for _, gid, lid in sorted(pairs):
+            if gid in used or lid in id_map:
+                continue
+            id_map[lid] = gid
+            used.add(gid)
 
-    LAST_SUMMARY = video_summary
-    return out_video, out_csv, rid, len(logs), logs, video_summary
+        for lid in sorted(res["fish"]):
+            id_map[lid] = aggregator.absorb_fish(res["fish"][lid], prefix, into=id_map.get(lid))
+
+        id_maps.append(id_map)
+
+    return aggregator, id_maps
+
+
+def iter_shard_rows(shard_results, id_maps):
+    for res, id_map in zip(shard_results, id_maps):
+        with open(res["csv"], newline="") as f:
+            for row in csv.DictReader(f):
+                row["frame"] = int(row["frame"])
+                row["fish_id"] = id_map[int(row["fish_id"])]
+                row["track_id"] = f"{res['shard']}-{row['track_id']}"
+                yield row
+
+
+def analyze_video_shards(video_path, n_frames, workers, rid, writer, log_writer):
+    """Jalur paralel: shard di process pool, lalu stitching + render anotasi."""
+    shards = plan_video_shards(n_frames, workers)
+    shard_dir = tempfile.mkdtemp(prefix="goldfish_shards_")
+
+    try:
+        tasks = [
+            (video_path, k, start, end, os.path.join(shard_dir, f"shard_{k:03d}.csv"))
+            for k, (start, end) in enumerate(shards)
+        ]
+        settings = {name: globals()[name] for name in SHARD_WORKER_SETTINGS}
+
+        print(f"[INFO] Analisis video paralel: {len(tasks)} shard, {n_frames} frame")
+        # spawn: tiap worker memuat model sendiri (aman untuk torch, sama di Windows/Linux)
+        ctx = multiprocessing.get_context("spawn")
+        with ctx.Pool(len(tasks), initializer=_init_shard_worker, initargs=(settings,)) as pool:
+            shard_results = pool.map(_analyze_shard, tasks)
+
+        aggregator, id_maps = stitch_shards(shard_results)
+
+        # render video anotasi + CSV gabungan dengan ID global (tanpa inferensi)
+        cap = cv2.VideoCapture(video_path)
+        rows = iter_shard_rows(shard_results, id_maps)
+        row = next(rows, None)
+        total_logs = 0
+        frame_idx = 0
+
+        while True:
+            ok, frame = cap.read()
+            if not ok:
+                break
+
+            while row is not None and row["frame"] == frame_idx:
+                box = [float(row[k]) for k in ("x1", "y1", "x2", "y2")]
+                head = (float(row["hx"]), float(row["hy"]))
+                tail = (float(row["tx"]), float(row["ty"]))
+                draw_annotations(frame, box, head, tail, float(row["length_cm"]), fish_id=row["fish_id"])
+
+                log_writer.writerow({
+                    "run_id": rid,
+                    "frame": frame_idx,
+                    "track_id": row["track_id"],
+                    "fish_id": row["fish_id"],
+                    "confidence": row["confidence"],
+                    "length_px": row["length_px"],
+                    "length_cm": row["length_cm"],
+                })
+                total_logs += 1
+                row = next(rows, None)
+
+            writer.write(frame)
+            frame_idx += 1
+
+        cap.release()
+    finally:
+        shutil.rmtree(shard_dir, ignore_errors=True)
+
+    return total_logs, aggregator
 
 
 # ============================================================
@@ -544,14 +1464,26 @@ def stream_record_stop():
 # ROUTE FILE OUTPUT
 # ============================================================
 
+def send_analysis_file(folder, filename):
+    """
+    Kirim file hasil dengan ETag, dukungan Range (scrubbing video) dan
+    Cache-Control immutable, karena nama file hasil unik per run (reserve_output).
+    """
+    resp = send_from_directory(folder, filename, conditional=True, etag=True,
+                               max_age=ANALYSIS_CACHE_MAX_AGE)
+    resp.cache_control.public = True
+    resp.cache_control.immutable = True
+    return resp
+
+
 @app.route("/analisa_gambar/<path:filename>")
 def serve_analysis_image(filename):
-    return send_file(os.path.join(WEB_OUTPUT_IMAGE, filename))
+    return send_analysis_file(WEB_OUTPUT_IMAGE, filename)
 
 
 @app.route("/analisa_video/<path:filename>")
 def serve_analysis_video(filename):
-    return send_file(os.path.join(WEB_OUTPUT_VIDEO, filename))
+    return send_analysis_file(WEB_OUTPUT_VIDEO, filename)
 
 
 # ============================================================
@@ -589,12 +1521,16 @@ def api_image():
     f.save(saved)
 
     img_name, csv_name, summary, records = analyze_image(saved)
+    webp_name, thumb_name = image_variant_names(img_name)
 
     return jsonify({
         "status": "ok",
         "summary": summary,
-        "records": records,
+        "total_records": len(records),
+        "records_url": f"/api/records/image/{csv_name}",
         "image_url": f"/analisa_gambar/{img_name}",
+        "webp_url": f"/analisa_gambar/{webp_name}",
+        "thumb_url": f"/analisa_gambar/{thumb_name}",
         "csv_url": f"/analisa_gambar/{csv_name}",
     })
 
@@ -605,7 +1541,11 @@ def api_video():
     saved = os.path.join(UPLOAD_DIR, f.filename)
     f.save(saved)
 
-    video_name, csv_name, rid, total_logs, logs, video_summary = analyze_video(saved)
+    workers = request.form.get("workers", "1")
+    if workers != "auto":
+        workers = int(workers) if workers.isdigit() else 1
+
+    video_name, csv_name, rid, total_logs, fish_records, video_summary = analyze_video(saved, workers=workers)
 
     return jsonify({
         "status": "ok",
@@ -614,7 +1554,68 @@ def api_video():
         "video_url": f"/analisa_video/{video_name}",
         "csv_url": f"/analisa_video/{csv_name}",
         "total_logs": total_logs,
-        "records": logs,
+        "records_url": f"/api/records/video/{csv_name}",
+        "fish": fish_records,
+    })
+
+
+@lru_cache(maxsize=256)
+def count_csv_rows(csv_path: str, mtime: float) -> int:
+    # mtime ikut jadi key cache, file hasil tidak berubah setelah ditulis
+    with open(csv_path, "rb") as f:
+        return max(sum(1 for _ in f) - 1, 0)
+
+
+@app.route("/api/records/<kind>/<csv_name>")
+def api_records(kind, csv_name):
+    """Baris CSV hasil analisis per halaman (dimuat lazy oleh tabel frontend)."""
+    folder = {"image": WEB_OUTPUT_IMAGE, "video": WEB_OUTPUT_VIDEO}.get(kind)
+    csv_path = os.path.join(folder or "", csv_name)
+    if (folder is None or not csv_name.endswith(".csv") or os.path.basename(csv_name) != csv_name
+            or not os.path.isfile(csv_path)):
+        return jsonify({"status": "error", "message": "Data hasil tidak ditemukan."}), 404
+
+    page = max(request.args.get("page", 1, type=int), 1)
+    per_page = min(max(request.args.get("per_page", RECORDS_PER_PAGE, type=int), 1), RECORDS_MAX_PER_PAGE)
+
+    total = count_csv_rows(csv_path, os.path.getmtime(csv_path))
+    pages = max(math.ceil(total / per_page), 1)
+    page = min(page, pages)
+    offset = (page - 1) * per_page
+
+    if total == 0:
+        records = []
+    else:
+        df = pd.read_csv(csv_path, skiprows=range(1, offset + 1), nrows=per_page)
+        records = df.astype(object).where(df.notna(), None).to_dict(orient="records")
+
+    return jsonify({
+        "status": "ok",
+        "page": page,
+        "pages": pages,
+        "per_page": per_page,
+        "total": total,
+        "records": records,
+    })
+
+
+@app.route("/api/growth")
+def api_growth():
+    period = request.args.get("period", "day")
+    since = request.args.get("since")
+
+    try:
+        curve = growth_curve(period, since)
+    except ValueError as e:
+        return jsonify({"status": "error", "message": str(e)}), 400
+
+    daily = curve if period == "day" else growth_curve("day", since)
+
+    return jsonify({
+        "status": "ok",
+        "period": period,
+        "curve": curve,
+        "projection": project_harvest(daily),
     })
 
 
@@ -0,0 +1,671 @@
+"""
+Benchmark & regresi performa jalur analisis (CPU).
+
+Mengukur:
+  - waktu load model + inferensi pertama (warm-up)
+  - analyze_image  : gambar/detik + persentil latency per tahap
+  - analyze_video  : fps + persentil latency inferensi per frame
+  - yolo_stream_generator : fps encode stream (clip dipakai sebagai sumber)
+  - (opsional) INFERENCE_MODE full / roi / tiled : latency + kecocokan deteksi
+  - (opsional) analyze_video paralel (process pool) vs satu proses
+  - peak RSS proses
+
+Contoh:
+  python benchmark.py                       # model asli, bandingkan ke baseline jika ada
+  python benchmark.py --mock                # model tiruan -> hanya overhead non-inferensi
+  python benchmark.py --save-baseline       # simpan hasil sebagai baseline baru
+  python benchmark.py --compare-inference   # bandingkan full / roi / tiled (gambar diperbesar ke 1920 px)
+  python benchmark.py --shards 4 --frames 1800   # skala video paralel vs satu proses
+
+Exit code 1 jika ada metrik yang lebih buruk dari baseline melebihi --threshold.
+"""
+
+import os
+import sys
+import json
+import time
+import glob
+import shutil
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+
+import cv2
+import numpy as np
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# ===============================
+# KONFIGURASI DEFAULT
+# ===============================
+DATASET_DIR = os.path.join(BASE_DIR, "dataset")
+VIDEO_PATH = os.path.join(BASE_DIR, "videos", "uji", "mas1.mp4")
+RESULT_DIR = os.path.join(BASE_DIR, "benchmark_results")
+BASELINE_PATH = os.path.join(RESULT_DIR, "baseline.json")
+OUTPUT_PATH = os.path.join(RESULT_DIR, "latest.json")
+
+NUM_IMAGES = 50
+NUM_FRAMES = 150
+NUM_STREAM_FRAMES = 100
+REGRESSION_THRESHOLD = 0.15  # 15% lebih buruk dari baseline = gagal
+INFERENCE_MODES = ["full", "roi", "tiled"]
+COMPARE_LONG_SIDE = 1920     # gambar dataset diperbesar ke ukuran frame kamera tangki (1080p)
+
+# metrik yang dibandingkan ke baseline: (path, arah) -> "higher" / "lower" lebih baik
+COMPARE_METRICS = [
+    ("model_load_s", "lower"),
+    ("image.images_per_sec", "higher"),
+    ("image.latency_ms.total.p50", "lower"),
+    ("image.latency_ms.total.p95", "lower"),
+    ("image.latency_ms.postprocess.p50", "lower"),
+    ("video.fps", "higher"),
+    ("video.latency_ms.inference.p95", "lower"),
+    ("video.overhead_ms_per_frame", "lower"),
+    ("video_sharding.speedup", "higher"),
+    ("inference_modes.roi.recall_vs_full", "higher"),
+    ("inference_modes.tiled.recall_vs_full", "higher"),
+    ("inference_modes.tiled.recall_by_length.harvest.recall", "higher"),
+    ("stream.fps", "higher"),
+    ("peak_rss_mb", "lower"),
+]
+
+
+# ===============================
+# MODEL TIRUAN (--mock)
+# ===============================
+class _Array:
+    """Meniru tensor ultralytics: .cpu().numpy()"""
+
+    def __init__(self, data):
+        self.data = np.asarray(data, dtype=np.float32)
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.data
+
+    def __len__(self):
+        return len(self.data)
+
+
+class _MockKeypoints:
+    def __init__(self, xy):
+        self.xy = _Array(xy)
+
+    def __len__(self):
+        return len(self.xy)
+
+
+class _MockBoxes:
+    def __init__(self, xyxy, conf):
+        self.xyxy = _Array(xyxy)
+        self.conf = _Array(conf)
+
+
+class _MockResult:
+    def __init__(self, kpts, boxes, confs):
+        self.keypoints = _MockKeypoints(kpts)
+        self.boxes = _MockBoxes(boxes, confs)
+
+
+def _view_origin(img):
+    """
+    Frame asal + offset (x, y) jika img adalah crop/tile (view numpy) dari frame
+    lain, supaya model tiruan melihat ikan yang sama di mode roi / tiled.
+    """
+    root = img
+    while isinstance(root.base, np.ndarray):
+        root = root.base
+    if root is img or root.ndim != img.ndim or root.strides != img.strides:
+        return img, 0, 0
+
+    offset = img.__array_interface__["data"][0] - root.__array_interface__["data"][0]
+    y, rest = divmod(offset, root.strides[0])
+    return root, rest // root.strides[1], y
+
+
+class MockYOLO:
+    """
+    Pengganti YOLO tanpa inferensi: mengembalikan MOCK_FISH ikan dengan posisi
+    dan panjang tetap (relatif ukuran frame), sehingga filter, anotasi, tracking,
+    tulis CSV/video tetap berjalan seperti biasa. Untuk crop/tile, ikan dipotong
+    di tepi tile seperti model asli.
+    """
+
+    MOCK_FISH = 5
+
+    def __init__(self, path=None, *args, **kwargs):
+        self.path = path
+
+    def _predict_one(self, img):
+        frame, ox, oy = _view_origin(img)
+        fh, fw = frame.shape[:2]
+        h, w = img.shape[:2]
+        kpts, boxes, confs = [], [], []
+        for i in range(self.MOCK_FISH):
+            cx = fw * (0.25 + 0.5 * i / max(self.MOCK_FISH - 1, 1)) - ox
+            cy = fh * (0.3 + 0.4 * (i % 2)) - oy
+            half = max(fw, fh) * (0.05 + 0.01 * i)
+            x1, x2 = max(cx - half, 0.0), min(cx + half, float(w))
+            y1, y2 = max(cy - half / 3, 0.0), min(cy + half / 3, float(h))
+            if x2 <= x1 or y2 <= y1:
+                continue
+            kpts.append([[x1, min(max(cy, 0.0), h)], [x2, min(max(cy, 0.0), h)]])
+            boxes.append([x1, y1, x2, y2])
+            confs.append(0.9 - 0.02 * i)
+        return _MockResult(np.array(kpts, dtype=np.float32).reshape(-1, 2, 2),
+                           np.array(boxes, dtype=np.float32).reshape(-1, 4),
+                           np.array(confs, dtype=np.float32))
+
+    def __call__(self, source, *args, **kwargs):
+        if isinstance(source, (list, tuple)):
+            return [self._predict_one(img) for img in source]
+        return [self._predict_one(source)]
+
+
+# ===============================
+# UTILITAS
+# ===============================
+class TimedModel:
+    """Proxy model yang mencatat durasi tiap pemanggilan (inferensi)."""
+
+    def __init__(self, model):
+        self.model = model
+        self.durations = []
+
+    def __call__(self, *args, **kwargs):
+        t0 = time.perf_counter()
+        out = self.model(*args, **kwargs)
+        self.durations.append(time.perf_counter() - t0)
+        return out
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def reset(self):
+        self.durations = []
+
+
+def percentiles_ms(values):
+    if not values:
+        return {"p50": 0.0, "p90": 0.0, "p95": 0.0, "p99": 0.0, "mean": 0.0}
+    arr = np.asarray(values, dtype=float) * 1000.0
+    return {
+        "p50": float(np.percentile(arr, 50)),
+        "p90": float(np.percentile(arr, 90)),
+        "p95": float(np.percentile(arr, 95)),
+        "p99": float(np.percentile(arr, 99)),
+        "mean": float(arr.mean()),
+    }
+
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux: KB, macOS: byte
+    return rss / (1024.0 * 1024.0) if sys.platform == "darwin" else rss / 1024.0
+
+
+def make_clip(src, dst, num_frames):
+    """
+    Tulis num_frames frame dari video sumber ke file sementara. Jika sumber
+    lebih pendek, video diulang dari awal (clip panjang untuk uji --shards).
+    """
+    cap = cv2.VideoCapture(src)
+    if not cap.isOpened():
+        raise RuntimeError(f"Gagal membuka video: {src}")
+
+    fps = cap.get(cv2.CAP_PROP_FPS) or 15
+    w = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    h = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    writer = cv2.VideoWriter(dst, cv2.VideoWriter_fourcc(*"mp4v"), fps, (w, h))
+
+    written = 0
+    read_this_pass = 0
+    while written < num_frames:
+        ok, frame = cap.read()
+        if not ok:
+            if read_this_pass == 0:
+                break
+            cap.release()
+            cap = cv2.VideoCapture(src)
+            read_this_pass = 0
+            continue
+        writer.write(frame)
+        written += 1
+        read_this_pass += 1
+
+    cap.release()
+    writer.release()
+    return written
+
+
+def get_metric(result, path):
+    cur = result
+    for key in path.split("."):
+        if not isinstance(cur, dict) or key not in cur:
+            return None
+        cur = cur[key]
+    return cur
+
+
+# ===============================
+# LOAD APP (MODEL ASLI / TIRUAN)
+# ===============================
+def load_app(mock: bool):
+    """Import app.py dengan YOLO yang dibungkus pengukur waktu load."""
+    import ultralytics
+
+    orig_cls = ultralytics.YOLO
+    model_cls = MockYOLO if mock else orig_cls
+    load_times = []
+
+    def timed_yolo(*args, **kwargs):
+        t0 = time.perf_counter()
+        m = model_cls(*args, **kwargs)
+        load_times.append(time.perf_counter() - t0)
+        return m
+
+    ultralytics.YOLO = timed_yolo
+    try:
+        import app
+    finally:
+        ultralytics.YOLO = orig_cls
+
+    return app, (load_times[0] if load_times else 0.0)
+
+
+def isolate_outputs(app, workdir):
+    """Arahkan semua output app ke folder sementara (tidak mengotori analisa_*)."""
+    app.WEB_OUTPUT_IMAGE = os.path.join(workdir, "analisa_gambar")
+    app.WEB_OUTPUT_VIDEO = os.path.join(workdir, "analisa_video")
+    app.GROWTH_DB_PATH = os.path.join(workdir, "growth.db")
+    os.makedirs(app.WEB_OUTPUT_IMAGE, exist_ok=True)
+    os.makedirs(app.WEB_OUTPUT_VIDEO, exist_ok=True)
+    app.init_growth_store()
+
+
+# ===============================
+# BENCHMARK PER JALUR
+# ===============================
+def bench_images(app, timed, image_paths):
+    totals, inference, post = [], [], []
+    fish = 0
+
+    for path in image_paths:
+        timed.reset()
+        t0 = time.perf_counter()
+        _, _, summary, _ = app.analyze_image(path)
+        total = time.perf_counter() - t0
+
+        infer = sum(timed.durations)
+        totals.append(total)
+        inference.append(infer)
+        post.append(total - infer)
+        fish += summary["num_fish"]
+
+    elapsed = sum(totals)
+    return {
+        "num_images": len(image_paths),
+        "num_fish": fish,
+        "images_per_sec": len(image_paths) / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": {
+            "total": percentiles_ms(totals),
+            "inference": percentiles_ms(inference),
+            "postprocess": percentiles_ms(post),
+        },
+    }
+
+
+def valid_fish(app, kpts, boxes, confs, img_shape):
+    """Filter yang sama dengan analyze_image -> list (center, length_cm, length_px)."""
+    fish = []
+    for i in range(len(kpts)):
+        if confs[i] < app.CONF_THRESHOLD:
+            continue
+        head, tail = kpts[i, 0], kpts[i, 1]
+        length_px = float(np.linalg.norm(head - tail))
+        if length_px < app.MIN_LENGTH_PX or not app.inside_valid_roi(boxes[i], img_shape):
+            continue
+        fish.append(((head + tail) / 2.0, length_px / app.PX_PER_CM, length_px))
+    return fish
+
+
+def resize_long_side(img, long_side):
+    h, w = img.shape[:2]
+    if not long_side or max(h, w) == long_side:
+        return img
+    scale = long_side / float(max(h, w))
+    interp = cv2.INTER_LINEAR if scale > 1 else cv2.INTER_AREA
+    return cv2.resize(img, (int(round(w * scale)), int(round(h * scale))), interpolation=interp)
+
+
+def length_bucket(app, length_cm):
+    if length_cm >= app.HARVEST_LENGTH_CM:
+        return "harvest"
+    if length_cm >= app.NEAR_HARVEST_LENGTH_CM:
+        return "near"
+    return "small"
+
+
+def bench_inference_modes(app, timed, image_paths, modes, long_side=COMPARE_LONG_SIDE):
+    """
+    Bandingkan latency & hasil deteksi tiap INFERENCE_MODE terhadap full frame.
+    dataset/ tidak punya label, jadi full frame dipakai sebagai referensi:
+    ikan dianggap cocok jika titik tengahnya < setengah panjang ikan referensi.
+
+    Gambar diperbesar ke long_side px (ukuran frame kamera tangki) supaya ikan
+    besar melintasi batas tile; recall juga dipecah per kelas panjang
+    (small / near / harvest) agar mode yang membuang ikan besar terlihat.
+    """
+    images = [resize_long_side(cv2.imread(p), long_side) for p in image_paths]
+    per_mode = {}
+
+    for mode in modes:
+        latencies, fish_per_img = [], []
+        for img in images:
+            timed.reset()
+            t0 = time.perf_counter()
+            kpts, boxes, confs = app.predict_fish(img, mode)
+            latencies.append(time.perf_counter() - t0)
+            fish_per_img.append(valid_fish(app, kpts, boxes, confs, img.shape))
+        per_mode[mode] = (latencies, fish_per_img)
+
+    ref = per_mode["full"][1] if "full" in per_mode else None
+    report = {}
+    for mode, (latencies, fish_per_img) in per_mode.items():
+        entry = {
+            "num_fish": sum(len(f) for f in fish_per_img),
+            "latency_ms": percentiles_ms(latencies),
+        }
+
+        if ref is not None:
+            matched, length_diff = 0, []
+            by_length = {b: {"ref": 0, "matched": 0} for b in ("small", "near", "harvest")}
+            for ref_fish, fish in zip(ref, fish_per_img):
+                used = set()
+                for c_ref, len_ref, px_ref in ref_fish:
+                    bucket = by_length[length_bucket(app, len_ref)]
+                    bucket["ref"] += 1
+                    best, best_d = None, None
+                    for j, (c, length_cm, _) in enumerate(fish):
+                        d = float(np.linalg.norm(c - c_ref))
+                        if j not in used and d < px_ref / 2.0 and (best_d is None or d < best_d):
+                            best, best_d = j, d
+                    if best is not None:
+                        used.add(best)
+                        matched += 1
+                        bucket["matched"] += 1
+                        length_diff.append(abs(fish[best][1] - len_ref))
+
+            num_ref = sum(len(f) for f in ref)
+            entry.update({
+                "matched_vs_full": matched,
+                "recall_vs_full": matched / num_ref if num_ref else 0.0,
+                "extra_vs_full": entry["num_fish"] - matched,
+                "mean_abs_length_diff_cm": float(np.mean(length_diff)) if length_diff else 0.0,
+                "recall_by_length": {
+                    b: dict(v, recall=v["matched"] / v["ref"] if v["ref"] else None)
+                    for b, v in by_length.items()
+                },
+            })
+
+        report[mode] = entry
+
+    return report
+
+
+def bench_video(app, timed, clip_path, num_frames):
+    timed.reset()
+    t0 = time.perf_counter()
+    _, _, _, total_logs, _, summary = app.analyze_video(clip_path)
+    elapsed = time.perf_counter() - t0
+
+    infer = sum(timed.durations)
+    return {
+        "num_frames": num_frames,
+        "num_fish": summary["num_fish"],
+        "total_logs": total_logs,
+        "elapsed_s": elapsed,
+        "fps": num_frames / elapsed if elapsed > 0 else 0.0,
+        "overhead_ms_per_frame": (elapsed - infer) * 1000.0 / max(num_frames, 1),
+        "latency_ms": {
+            "inference": percentiles_ms(timed.durations),
+        },
+    }
+
+
+def bench_video_sharding(app, clip_path, workers):
+    """Bandingkan analyze_video satu proses vs process pool (workers shard)."""
+    t0 = time.perf_counter()
+    _, _, _, _, _, single = app.analyze_video(clip_path, workers=1)
+    single_s = time.perf_counter() - t0
+
+    cap = cv2.VideoCapture(clip_path)
+    n_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    cap.release()
+    used = app.resolve_video_workers(workers, n_frames)
+
+    t0 = time.perf_counter()
+    _, _, _, _, _, sharded = app.analyze_video(clip_path, workers=workers)
+    sharded_s = time.perf_counter() - t0
+
+    speedup = single_s / sharded_s if sharded_s > 0 else 0.0
+    return {
+        "workers_requested": workers,
+        "workers_used": used,
+        "single_s": single_s,
+        "sharded_s": sharded_s,
+        "speedup": speedup,
+        "efficiency": speedup / used,
+        "num_fish_single": single["num_fish"],
+        "num_fish_sharded": sharded["num_fish"],
+    }
+
+
+def bench_stream(app, clip_path, num_frames):
+    # clip dipakai sebagai pengganti kamera RTSP
+    app.RTSP_URL = clip_path
+    gen = app.yolo_stream_generator()
+
+    latencies = []
+    t_start = time.perf_counter()
+    for _ in range(num_frames):
+        t0 = time.perf_counter()
+        next(gen)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - t_start
+    gen.close()
+
+    return {
+        "num_frames": num_frames,
+        "fps": num_frames / elapsed if elapsed > 0 else 0.0,
+        "latency_ms": {"frame": percentiles_ms(latencies)},
+    }
+
+
+# ===============================
+# BANDINGKAN DENGAN BASELINE
+# ===============================
+def compare(result, baseline, threshold):
+    regressions = []
+
+    print("\n==================== BANDING BASELINE ====================")
+    print(f"{'metrik':40s} {'baseline':>12s} {'sekarang':>12s} {'delta':>8s}")
+
+    for path, direction in COMPARE_METRICS:
+        old = get_metric(baseline, path)
+        new = get_metric(result, path)
+        if old is None or new is None or old == 0:
+            continue
+
+        delta = (new - old) / abs(old)
+        worse = -delta if direction == "higher" else delta
+        flag = ""
+        if worse > threshold:
+            regressions.append(path)
+            flag = "  <-- REGRESI"
+
+        print(f"{path:40s} {old:12.3f} {new:12.3f} {delta * 100:+7.1f}%{flag}")
+
+    if baseline.get("meta", {}).get("mock") != result.get("meta", {}).get("mock"):
+        print("[WARN] Mode mock baseline dan hasil sekarang berbeda.")
+
+    return regressions
+
+
+# ===============================
+# MAIN
+# ===============================
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark jalur analisis goldfish_cv_iot")
+    parser.add_argument("--mock", action="store_true", help="pakai model tiruan (tanpa inferensi)")
+    parser.add_argument("--images", type=int, default=NUM_IMAGES, help="jumlah gambar dari dataset/")
+    parser.add_argument("--video", default=VIDEO_PATH, help="video sumber clip")
+    parser.add_argument("--frames", type=int, default=NUM_FRAMES, help="jumlah frame clip video")
+    parser.add_argument("--stream-frames", type=int, default=NUM_STREAM_FRAMES)
+    parser.add_argument("--inference-mode", choices=INFERENCE_MODES, default=None,
+                        help="override INFERENCE_MODE app.py untuk semua jalur")
+    parser.add_argument("--compare-inference", action="store_true",
+                        help="bandingkan latency & deteksi full / roi / tiled pada gambar")
+    parser.add_argument("--compare-size", type=int, default=COMPARE_LONG_SIDE,
+                        help="sisi terpanjang gambar untuk --compare-inference (0 = ukuran asli)")
+    parser.add_argument("--shards", type=int, default=0,
+                        help="bandingkan analyze_video satu proses vs N worker (butuh model asli, "
+                             "clip >= N x VIDEO_SHARD_MIN_SHARD_FRAMES frame)")
+    parser.add_argument("--out", default=OUTPUT_PATH, help="file JSON hasil")
+    parser.add_argument("--baseline", default=BASELINE_PATH, help="file JSON baseline")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD)
+    parser.add_argument("--save-baseline", action="store_true", help="simpan hasil sebagai baseline")
+    args = parser.parse_args()
+
+    # paksa CPU agar hasil sebanding antar mesin
+    os.environ["CUDA_VISIBLE_DEVICES"] = ""
+
+    image_paths = sorted(glob.glob(os.path.join(DATASET_DIR, "*.jpg")))[:args.images]
+    if not image_paths:
+        print(f"Tidak ada gambar di {DATASET_DIR}")
+        return 2
+
+    workdir = tempfile.mkdtemp(prefix="goldfish_bench_")
+    try:
+        print("\n======================================")
+        print(f"   BENCHMARK START ({'MOCK' if args.mock else 'MODEL ASLI'})")
+        print("======================================\n")
+
+        app, model_load_s = load_app(args.mock)
+        isolate_outputs(app, workdir)
+
+        timed = TimedModel(app.model)
+        app.model = timed
+
+        if args.inference_mode:
+            app.INFERENCE_MODE = args.inference_mode
+
+        # warm-up: inferensi pertama biasanya jauh lebih lambat
+        warm = cv2.imread(image_paths[0])
+        t0 = time.perf_counter()
+        timed(warm)
+        first_inference_s = time.perf_counter() - t0
+
+        clip_path = os.path.join(workdir, "clip.mp4")
+        clip_frames = make_clip(args.video, clip_path, args.frames)
+        stream_frames = min(args.stream_frames, max(clip_frames - 1, 0))
+
+        print(f"[INFO] Gambar: {len(image_paths)}, frame video: {clip_frames}")
+
+        result = {
+            "meta": {
+                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+                "mock": args.mock,
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpu_count": os.cpu_count(),
+                "video": os.path.relpath(args.video, BASE_DIR),
+                "inference_mode": app.INFERENCE_MODE,
+            },
+            "model_load_s": model_load_s,
+            "first_inference_s": first_inference_s,
+            "image": bench_images(app, timed, image_paths),
+            "video": bench_video(app, timed, clip_path, clip_frames),
+            "stream": bench_stream(app, clip_path, stream_frames),
+        }
+        if args.compare_inference:
+            result["meta"]["compare_size"] = args.compare_size
+            result["inference_modes"] = bench_inference_modes(app, timed, image_paths, INFERENCE_MODES,
+                                                              args.compare_size)
+        if args.shards > 1:
+            if args.mock:
+                # worker shard memuat model asli sendiri, model tiruan tidak ikut
+                print("[WARN] --shards diabaikan pada mode --mock.")
+            else:
+                result["video_sharding"] = bench_video_sharding(app, clip_path, args.shards)
+        result["peak_rss_mb"] = peak_rss_mb()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    print("\n======================================")
+    print("           HASIL BENCHMARK")
+    print("======================================\n")
+    print(f"Load model          : {result['model_load_s']:.3f} s")
+    print(f"Inferensi pertama   : {result['first_inference_s']:.3f} s")
+    print(f"Gambar/detik        : {result['image']['images_per_sec']:.2f}")
+    print(f"Video fps           : {result['video']['fps']:.2f}")
+    print(f"Stream fps          : {result['stream']['fps']:.2f}")
+    sharding = result.get("video_sharding")
+    if sharding:
+        print(f"Video paralel       : {sharding['workers_used']} worker, {sharding['sharded_s']:.2f} s "
+              f"vs {sharding['single_s']:.2f} s (speedup {sharding['speedup']:.2f}x, "
+              f"efisiensi {sharding['efficiency'] * 100:.0f}%), ikan {sharding['num_fish_sharded']} "
+              f"vs {sharding['num_fish_single']}")
+        if sharding["workers_used"] < sharding["workers_requested"]:
+            print("[WARN] Worker dibatasi: clip < worker x VIDEO_SHARD_MIN_SHARD_FRAMES (tambah --frames) "
+                  "atau melebihi VIDEO_SHARD_WORKERS (jumlah CPU - 1).")
+    for mode, entry in result.get("inference_modes", {}).items():
+        print(f"Mode {mode:14s}: p50 {entry['latency_ms']['p50']:.1f} ms, ikan {entry['num_fish']}, "
+              f"recall vs full {entry.get('recall_vs_full', 0.0):.2f}, "
+              f"selisih panjang {entry.get('mean_abs_length_diff_cm', 0.0):.2f} cm")
+        for bucket, stat in entry.get("recall_by_length", {}).items():
+            if stat["ref"]:
+                print(f"  recall {bucket:11s}: {stat['recall']:.2f} ({stat['matched']}/{stat['ref']})")
+    if result["peak_rss_mb"] is not None:
+        print(f"Peak RSS            : {result['peak_rss_mb']:.1f} MB")
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nHasil disimpan: {args.out}")
+
+    if args.save_baseline:
+        os.makedirs(os.path.dirname(os.path.abspath(args.baseline)), exist_ok=True)
+        with open(args.baseline, "w") as f:
+            json.dump(result, f, indent=2)
+        print(f"Baseline disimpan: {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("[INFO] Baseline belum ada, jalankan dengan --save-baseline.")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+
+    regressions = compare(result, baseline, args.threshold)
+    if regressions:
+        print(f"\n[FAIL] {len(regressions)} metrik regresi > {args.threshold * 100:.0f}%: {', '.join(regressions)}")
+        return 1
+
+    print("\n[OK] Tidak ada regresi.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,76 @@ function setStatus(el, text, type = "info") {
   el.classList.add(type);
 }
 
+function fmtNum(v, digits) {
+  return (typeof v === "number") ? v.toFixed(digits) : "-";
+}
+
+/* ============================================================
+   TABEL HASIL (DIMUAT PER HALAMAN DARI /api/records)
+============================================================ */
+
+const RECORDS_PER_PAGE = 50;
+
+function createRecordsTable(tbody, pager, renderRow) {
+  let url = null;
+  let page = 1;
+  let pages = 1;
+
+  const btnPrev = document.createElement("button");
+  const btnNext = document.createElement("button");
+  const info = document.createElement("span");
+  btnPrev.type = btnNext.type = "button";
+  btnPrev.textContent = "‹ Sebelumnya";
+  btnNext.textContent = "Berikutnya ›";
+
+  if (pager) {
+    pager.append(btnPrev, info, btnNext);
+    pager.classList.add("hidden");
+  }
+
+  async function load(p) {
+    if (!url) return;
+    btnPrev.disabled = btnNext.disabled = true;
+
+    let data;
+    try {
+      const resp = await fetch(`${url}?page=${p}&per_page=${RECORDS_PER_PAGE}`);
+      data = await resp.json();
+    } catch (err) {
+      data = { status: "error" };
+    }
+
+    if (data.status !== "ok") {
+      tbody.innerHTML = "";
+      info.textContent = data.message || "Gagal memuat data.";
+      if (pager) pager.classList.remove("hidden");
+      // aktifkan lagi navigasi supaya halaman lain tetap bisa dibuka
+      btnPrev.disabled = page <= 1;
+      btnNext.disabled = page >= pages;
+      return;
+    }
+
+    page = data.page;
+    pages = data.pages;
+    tbody.innerHTML = data.records.map(renderRow).join("");
+
+    info.textContent = ` Halaman ${page} / ${pages} (${data.total} baris) `;
+    btnPrev.disabled = page <= 1;
+    btnNext.disabled = page >= pages;
+    if (pager) pager.classList.toggle("hidden", pages <= 1);
+  }
+
+  btnPrev.addEventListener("click", () => load(page - 1));
+  btnNext.addEventListener("click", () => load(page + 1));
+
+  return {
+    show(recordsUrl) {
+      url = recordsUrl;
+      return load(1);
+    },
+  };
+}
+
 /* ============================================================
    ANALISIS GAMBAR
 ============================================================ */
@@ -18,8 +88,16 @@ const previewOriginal = document.getElementById("preview-original");
 const previewAnnotated = document.getElementById("preview-annotated");
 const summaryBox = document.getElementById("summary-box");
 const fishTableBody = document.querySelector("#fish-table tbody");
+const fishPager = document.getElementById("fish-pager");
 const csvLink = document.getElementById("csv-link");
 
+const fishTable = fishTableBody && createRecordsTable(fishTableBody, fishPager, (r) => `
+  <tr>
+    <td>${r.fish_id}</td>
+    <td>${fmtNum(r.confidence, 3)}</td>
+    <td>${fmtNum(r.length_cm, 2)}</td>
+  </tr>`);
+
 // tombol feed (image page)
 const btnFeed = document.getElementById("btn-feed");
 const feedStatus = document.getElementById("feed-status");
@@ -46,7 +124,11 @@ if (imageForm) {
       return;
     }
 
-    previewAnnotated.src = data.image_url + "?v=" + Date.now();
+    // thumbnail tampil dulu, lalu diganti WebP ukuran penuh setelah selesai dimuat
+    previewAnnotated.src = data.thumb_url;
+    const full = new Image();
+    full.onload = () => { previewAnnotated.src = data.webp_url; };
+    full.src = data.webp_url;
     csvLink.href = data.csv_url;
 
     const s = data.summary;
@@ -59,16 +141,7 @@ if (imageForm) {
     `;
     summaryBox.classList.remove("muted");
 
-    fishTableBody.innerHTML = "";
-    data.records.forEach((r) => {
-      const row = `
-        <tr>
-          <td>${r.fish_id}</td>
-          <td>${r.confidence.toFixed(3)}</td>
-          <td>${r.length_cm.toFixed(2)}</td>
-        </tr>`;
-      fishTableBody.insertAdjacentHTML("beforeend", row);
-    });
+    fishTable.show(data.records_url);
 
     setStatus(imageStatus, "Analisis selesai.", "info");
 
@@ -116,10 +189,21 @@ const videoForm = document.getElementById("video-form");
 const videoInput = document.getElementById("video-input");
 const videoStatus = document.getElementById("video-status");
 const btnVideo = document.getElementById("btn-video");
+const videoParallel = document.getElementById("video-parallel");
 
 const videoPreview = document.getElementById("video-preview");
 const videoCsv = document.getElementById("video-csv");
 const videoSummary = document.getElementById("video-summary");
+const videoLogBody = document.querySelector("#video-log-table tbody");
+const videoLogPager = document.getElementById("video-log-pager");
+
+const videoLogTable = videoLogBody && createRecordsTable(videoLogBody, videoLogPager, (r) => `
+  <tr>
+    <td>${r.frame}</td>
+    <td>${r.fish_id ?? r.track_id ?? "-"}</td>
+    <td>${fmtNum(r.confidence, 3)}</td>
+    <td>${fmtNum(r.length_cm, 2)}</td>
+  </tr>`);
 
 // tombol feed (video page)
 const btnFeedVideo = document.getElementById("btn-feed-video");
@@ -133,6 +217,7 @@ if (videoForm) {
 
     const form = new FormData();
     form.append("video", videoInput.files[0]);
+    if (videoParallel?.checked) form.append("workers", "auto");
 
     setStatus(videoStatus, "Memproses video...", "info");
     btnVideo.disabled = true;
@@ -146,7 +231,7 @@ if (videoForm) {
       return;
     }
 
-    videoPreview.src = data.video_url + "?v=" + Date.now();
+    videoPreview.src = data.video_url;
     videoPreview.load();
     videoPreview.play().catch(() => {});
 
@@ -162,6 +247,8 @@ if (videoForm) {
       <p><strong>Total log deteksi:</strong> ${data.total_logs}</p>
     `;
 
+    if (videoLogTable) videoLogTable.show(data.records_url);
+
     setStatus(videoStatus, "Analisis video selesai.", "info");
 
     if (btnFeedVideo) btnFeedVideo.disabled = false;